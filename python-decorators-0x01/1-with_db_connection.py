@@ -1,16 +1,17 @@
-import sqlite3
 import functools
+import connection_pool
 
 # Decorator to handle database connections automatically
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
+        # Borrow this thread's pooled connection instead of opening a new one
+        pool = connection_pool.get_pool('users.db')
+        conn = pool.acquire()
         try:
-            result = func(conn, *args, **kwargs)
+            return func(conn, *args, **kwargs)
         finally:
-            conn.close()
-        return result
+            pool.release(conn)
     return wrapper
 
 @with_db_connection
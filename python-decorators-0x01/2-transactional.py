@@ -1,15 +1,17 @@
-import sqlite3
 import functools
+import connection_pool
 
-# Decorator to automatically open and close the DB connection
+# Decorator to automatically borrow and return a pooled DB connection
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
+        # Borrow this thread's pooled connection instead of opening a new one
+        pool = connection_pool.get_pool('users.db')
+        conn = pool.acquire()
         try:
             return func(conn, *args, **kwargs)
         finally:
-            conn.close()
+            pool.release(conn)
     return wrapper
 
 # Decorator to manage transactions: commit if success, rollback if error
@@ -1,16 +1,18 @@
 import time
-import sqlite3
 import functools
+import connection_pool
 
 # Reused from previous task
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
+        # Borrow this thread's pooled connection instead of opening a new one
+        pool = connection_pool.get_pool('users.db')
+        conn = pool.acquire()
         try:
             return func(conn, *args, **kwargs)
         finally:
-            conn.close()
+            pool.release(conn)
     return wrapper
 
 # Decorator that retries function on failure
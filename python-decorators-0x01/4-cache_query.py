@@ -1,34 +1,72 @@
-import time
-import sqlite3
+import os
 import functools
-
-query_cache = {}
+import connection_pool
+from query_cache import query_cache, enable_disk_cache, connection_path
 
 # Decorator to manage SQLite connections
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
+        # Borrow this thread's pooled connection instead of opening a new one
+        pool = connection_pool.get_pool('users.db')
+        conn = pool.acquire()
         try:
             return func(conn, *args, **kwargs)
         finally:
-            conn.close()
+            pool.release(conn)
     return wrapper
 
-# Decorator to cache query results by query string
-def cache_query(func):
+# Decorator to cache query results by database, query string and parameters
+def cache_query(func=None, *, ttl=None, cache=None):
+    if func is None:
+        return functools.partial(cache_query, ttl=ttl, cache=cache)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        store = query_cache if cache is None else cache
         query = kwargs.get("query") or (args[0] if args else None)
-        if query in query_cache:
+        params = kwargs.get("params") or (args[1] if len(args) > 1 else ())
+        db_path = connection_path(conn)
+        if db_path is None:
+            return func(conn, *args, **kwargs)
+        key = store.make_key(db_path, query, params)
+
+        # Background refreshes run after conn is released, on a short-lived
+        # thread, so open their own connection and close it when done
+        def refresh():
+            pool = connection_pool.get_pool(db_path)
+            refresh_conn = pool.acquire()
+            try:
+                return func(refresh_conn, *args, **kwargs)
+            finally:
+                pool.release(refresh_conn, close=True)
+
+        outcome, result = store.get_or_compute(
+            key, lambda: func(conn, *args, **kwargs), ttl, refresh)
+        if outcome == 'hit':
             print("[CACHE HIT] Returning cached result.")
-            return query_cache[query]
-        print("[CACHE MISS] Executing and caching result.")
-        result = func(conn, *args, **kwargs)
-        query_cache[query] = result
+        elif outcome == 'stale':
+            print("[CACHE STALE] Returning stale result, refreshing in background.")
+        elif outcome == 'disk':
+            print("[DISK HIT] Returning result from the on-disk cache.")
+        elif outcome == 'coalesced':
+            print("[CACHE WAIT] Reused result of identical in-flight query.")
+        else:
+            print("[CACHE MISS] Executing and caching result.")
         return result
     return wrapper
 
+# Decorator for writes: drops cached results of the tables they touch
+def invalidates_cache(*tables, cache=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            (query_cache if cache is None else cache).invalidate_tables(*tables)
+            return result
+        return wrapper
+    return decorator
+
 @with_db_connection
 @cache_query
 def fetch_users_with_cache(conn, query):
@@ -36,6 +74,17 @@ def fetch_users_with_cache(conn, query):
     cursor.execute(query)
     return cursor.fetchall()
 
+@with_db_connection
+@invalidates_cache('users')
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+    conn.commit()
+
+# Keep results across restarts when QUERY_CACHE_PATH is set
+if os.environ.get('QUERY_CACHE_PATH'):
+    enable_disk_cache(os.environ['QUERY_CACHE_PATH'])
+
 # First call: executes and caches
 users = fetch_users_with_cache(query="SELECT * FROM users")
 
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import connection_pool
+
+# Pool settings compared: sqlite3's defaults against the tuned PRAGMAs
+CONFIGS = {
+    'default': {'pragmas': {}, 'cached_statements': 128},
+    'tuned': {},
+}
+USERS = 10_000
+CALLS = 20_000
+
+
+# Write a fresh users.db with `count` users into directory
+def seed_users(directory, count=USERS):
+    conn = sqlite3.connect(os.path.join(directory, 'users.db'))
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        ((i, f"User {i}", f"user{i}@example.com", 18 + i % 80) for i in range(1, count + 1)))
+    conn.commit()
+    conn.close()
+
+
+# Import the decorated functions from the task scripts without their demo output
+def load_functions():
+    with contextlib.redirect_stdout(io.StringIO()):
+        get_user_by_id = __import__('1-with_db_connection').get_user_by_id
+        update_user_email = __import__('2-transactional').update_user_email
+    return {
+        'get_user_by_id': lambda i: get_user_by_id(user_id=i),
+        'update_user_email': lambda i: update_user_email(user_id=i, new_email=f"new{i}@example.com"),
+    }
+
+
+def _calls_per_sec(function, calls, users):
+    start = time.perf_counter()
+    for i in range(calls):
+        function(i % users + 1)
+    return calls / (time.perf_counter() - start)
+
+
+# Run every function under every pool config, each on its own copy of
+# users.db since WAL mode stays set in the file
+def benchmark(calls=CALLS, users=USERS):
+    cwd = os.getcwd()
+    report = {}
+    with tempfile.TemporaryDirectory() as root:
+        seed_users(root, users)
+        os.chdir(root)
+        try:
+            functions = load_functions()
+            for name, options in CONFIGS.items():
+                directory = os.path.join(root, name)
+                os.mkdir(directory)
+                seed_users(directory, users)
+                os.chdir(directory)
+                connection_pool.configure_pool('users.db', **options)
+                report[name] = {}
+                for label, function in functions.items():
+                    report[name][label] = _calls_per_sec(function, calls, users)
+                    print(f"{name:<8} {label:<18} {report[name][label]:,.0f} calls/sec", file=sys.stderr)
+                connection_pool.get_pool('users.db').close_all()
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else CALLS
+    json.dump(benchmark(calls), sys.stdout, indent=2)
+    print()
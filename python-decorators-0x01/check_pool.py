@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import connection_pool
+
+# Check that connections opened by short-lived threads are closed when the
+# threads exit, so the pool stays bounded however many threads come and go.
+# Exits with status 1 if connections pile up.
+
+THREADS = 200
+
+
+def main(threads=THREADS):
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'users.db')
+        conn = sqlite3.connect(database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+        conn.execute("INSERT INTO users VALUES (1, 'e1')")
+        conn.commit()
+        conn.close()
+
+        pool = connection_pool.configure_pool(database)
+
+        def borrow():
+            conn = pool.acquire()
+            try:
+                conn.execute("SELECT email FROM users WHERE id = 1").fetchone()
+            finally:
+                pool.release(conn)
+
+        borrow()
+        for _ in range(threads):
+            thread = threading.Thread(target=borrow)
+            thread.start()
+            thread.join()
+
+        remaining = pool.open_connections()
+        pool.close_all()
+    print(f"{threads} threads borrowed a connection, {remaining} still open")
+    return remaining <= 1
+
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
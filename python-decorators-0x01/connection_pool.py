@@ -0,0 +1,232 @@
+import os
+import time
+import weakref
+import queue
+import atexit
+import sqlite3
+import threading
+
+# Connection pools shared by the with_db_connection decorators
+
+# Settings applied to every new pooled SQLite connection. WAL lets readers
+# run alongside a writer and, with synchronous=NORMAL, only syncs at
+# checkpoints instead of on every commit; mmap_size maps up to 256 MiB of
+# the file and a negative cache_size is in KiB (64 MiB of page cache).
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+# Prepared statements kept per connection (sqlite3's default is 128)
+CACHED_STATEMENTS = 512
+
+
+# Apply PRAGMA settings to a fresh connection. journal_mode=WAL is stored in
+# the database file, the others only last as long as the connection.
+def configure(conn, pragmas=PRAGMAS):
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+    return conn
+
+
+# Connections handed out by SQLitePool remember the file they were opened
+# on, so callers need not ask SQLite for it on every use
+class PooledConnection(sqlite3.Connection):
+    path = None
+
+
+# This thread's pooled connection, its creation time and borrow depth.
+# Only the thread-local storage refers to it, so it is dropped when its
+# thread exits, and a finalizer then closes the connection.
+class _Entry:
+    __slots__ = ('conn', 'created', 'depth', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.monotonic()
+        self.depth = 0
+
+
+# One SQLite connection per thread and database file, reused across calls.
+# SQLite connections are cheap to keep but must not be shared between
+# threads that use them concurrently, so each thread gets its own. Nested
+# borrows on one thread share that connection; only the outermost release
+# rolls back and only the outermost acquire may recycle it.
+class SQLitePool:
+    def __init__(self, database='users.db', pre_ping=False, recycle=3600, pragmas=PRAGMAS,
+                 cached_statements=CACHED_STATEMENTS, **connect_kwargs):
+        self.database = database
+        self.pre_ping = pre_ping
+        self.recycle = recycle
+        self.pragmas = dict(pragmas or {})
+        self.connect_kwargs = dict(connect_kwargs, cached_statements=cached_statements)
+        self._local = threading.local()
+        self._all = set()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               factory=PooledConnection, **self.connect_kwargs)
+        conn.path = conn.execute("PRAGMA database_list").fetchone()[2]
+        configure(conn, self.pragmas)
+        with self._lock:
+            self._all.add(conn)
+        entry = self._local.entry = _Entry(conn)
+        weakref.finalize(entry, self._discard, conn)
+        return entry
+
+    def _discard(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        conn.close()
+
+    # Return this thread's connection, reconnecting when it is too old or
+    # fails the optional ping
+    def acquire(self):
+        entry = getattr(self._local, 'entry', None)
+        if entry is not None and entry.depth:
+            entry.depth += 1
+            return entry.conn
+        if entry is not None and time.monotonic() - entry.created > self.recycle:
+            self._discard(entry.conn)
+            entry = None
+        if entry is not None and self.pre_ping:
+            try:
+                entry.conn.execute("SELECT 1")
+            except sqlite3.Error:
+                self._discard(entry.conn)
+                entry = None
+        if entry is None:
+            entry = self._connect()
+        entry.depth = 1
+        return entry.conn
+
+    # Keep the connection for the next call, without a half-finished
+    # transaction, or close it (close=True) when the thread is about to end
+    def release(self, conn, close=False):
+        entry = getattr(self._local, 'entry', None)
+        if entry is None or entry.conn is not conn:
+            return  # closed by close_all() meanwhile
+        entry.depth -= 1
+        if entry.depth:
+            return
+        if close:
+            self._discard(conn)
+            del self._local.entry
+        elif conn.in_transaction:
+            conn.rollback()
+
+    def close_all(self):
+        with self._lock:
+            conns, self._all = self._all, set()
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+    # Number of connections currently open across all threads
+    def open_connections(self):
+        with self._lock:
+            return len(self._all)
+
+
+# Fixed-size pool for server databases: callers borrow one of at most
+# `size` connections made by `factory`, waiting up to `timeout` seconds
+class BoundedPool:
+    def __init__(self, factory, size=5, timeout=30, pre_ping=True, recycle=3600, ping=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.recycle = recycle
+        self.ping = ping or (lambda conn: conn.cursor().execute("SELECT 1"))
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._created = {}
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Connection pool exhausted")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self.factory()
+                    self._created[id(conn)] = time.monotonic()
+                    return conn
+                if time.monotonic() - self._created[id(conn)] > self.recycle:
+                    self._discard(conn)
+                    continue
+                if self.pre_ping:
+                    try:
+                        self.ping(conn)
+                    except Exception:
+                        self._discard(conn)
+                        continue
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            conn.rollback()
+            self._idle.put(conn)
+        except Exception:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Pools are keyed by absolute path so 'users.db' and the full path of the
+# same file share one pool
+def _pool_key(database):
+    return database if database == ':memory:' else os.path.abspath(database)
+
+
+# Return the shared SQLitePool for a database file, created on first use
+def get_pool(database='users.db', **options):
+    database = _pool_key(database)
+    with _pools_lock:
+        if database not in _pools:
+            _pools[database] = SQLitePool(database, **options)
+        return _pools[database]
+
+
+# Replace the shared pool for a database file, e.g. to change its PRAGMAs
+def configure_pool(database='users.db', **options):
+    database = _pool_key(database)
+    pool = SQLitePool(database, **options)
+    with _pools_lock:
+        old = _pools.get(database)
+        _pools[database] = pool
+    if old is not None:
+        old.close_all()
+    return pool
+
+
+@atexit.register
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,472 @@
+import re
+import sys
+import time
+import atexit
+import struct
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# Query result cache behind the cache_query decorator: an in-memory LRU/TTL
+# tier with table-based invalidation and an optional on-disk tier
+
+# Tables a statement reads from or writes to
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+["`\[]?(\w+)', re.IGNORECASE)
+# Comma-separated table lists ("FROM orders o, users AS u"), whose tables
+# after the first are missed by TABLE_PATTERN
+TABLE_LIST_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN)\s+((?:["`\[]?\w+["`\]]?(?:\s+(?:AS\s+)?\w+)?\s*,\s*)+["`\[]?\w+)',
+    re.IGNORECASE)
+
+# Return the lower-cased table names referenced by a SQL statement
+def query_tables(query):
+    names = set(TABLE_PATTERN.findall(query))
+    for tables in TABLE_LIST_PATTERN.findall(query):
+        names.update(re.match(r'\s*["`\[]?(\w+)', table).group(1) for table in tables.split(','))
+    return frozenset(name.lower() for name in names)
+
+# Approximate memory footprint of a fetchall() result, in bytes
+def result_size(result):
+    size = sys.getsizeof(result)
+    if isinstance(result, (list, tuple)):
+        for row in result:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(value) for value in row)
+    return size
+
+# Compact binary encoding of query results (None, one row or a list of
+# rows) holding SQLite values: None, int, float, str and bytes
+_RESULT_NONE, _RESULT_ROW, _RESULT_ROWS = b'N', b'T', b'L'
+_VALUE_NONE, _VALUE_INT, _VALUE_FLOAT, _VALUE_STR, _VALUE_BYTES = range(5)
+
+
+def _encode_row(row, out):
+    out.append(struct.pack('<H', len(row)))
+    for value in row:
+        if value is None:
+            out.append(bytes((_VALUE_NONE,)))
+        elif isinstance(value, int) and not isinstance(value, bool):
+            out.append(struct.pack('<Bq', _VALUE_INT, value))
+        elif isinstance(value, float):
+            out.append(struct.pack('<Bd', _VALUE_FLOAT, value))
+        elif isinstance(value, str):
+            data = value.encode('utf-8')
+            out.append(struct.pack('<BI', _VALUE_STR, len(data)))
+            out.append(data)
+        elif isinstance(value, bytes):
+            out.append(struct.pack('<BI', _VALUE_BYTES, len(value)))
+            out.append(value)
+        else:
+            raise TypeError(f"Cannot serialize {type(value).__name__} value")
+
+
+def encode_result(result):
+    out = []
+    if result is None:
+        out.append(_RESULT_NONE)
+    elif isinstance(result, tuple):
+        out.append(_RESULT_ROW)
+        _encode_row(result, out)
+    else:
+        out.append(_RESULT_ROWS)
+        out.append(struct.pack('<I', len(result)))
+        for row in result:
+            _encode_row(row, out)
+    return b''.join(out)
+
+
+def _decode_row(data, offset):
+    (count,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    row = []
+    for _ in range(count):
+        tag = data[offset]
+        offset += 1
+        if tag == _VALUE_NONE:
+            row.append(None)
+        elif tag == _VALUE_INT:
+            row.append(struct.unpack_from('<q', data, offset)[0])
+            offset += 8
+        elif tag == _VALUE_FLOAT:
+            row.append(struct.unpack_from('<d', data, offset)[0])
+            offset += 8
+        else:
+            (length,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            value = data[offset:offset + length]
+            row.append(str(value, 'utf-8') if tag == _VALUE_STR else bytes(value))
+            offset += length
+    return tuple(row), offset
+
+
+def decode_result(data):
+    data = memoryview(data)
+    kind = bytes(data[:1])
+    if kind == _RESULT_NONE:
+        return None
+    if kind == _RESULT_ROW:
+        return _decode_row(data, 1)[0]
+    (count,) = struct.unpack_from('<I', data, 1)
+    offset = 5
+    rows = []
+    for _ in range(count):
+        row, offset = _decode_row(data, offset)
+        rows.append(row)
+    return rows
+
+
+# Persistent second cache tier: encoded results in a local SQLite file,
+# bounded by max_bytes (least recently used first) and per-entry TTLs
+# measured in wall-clock time so they survive restarts. Hits only record
+# their access time in memory; the times are written in batches of
+# flush_every, or before evicting, so reads don't cost a disk write.
+# The file may be shared by several processes: lookups and stores give up
+# after `timeout` seconds on a locked file (callers treat that as a miss)
+# and the byte total is re-read from the file before evicting
+class DiskCache:
+    def __init__(self, path='query_cache.db', max_bytes=256 * 1024 * 1024, flush_every=64,
+                 timeout=0.1):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.timeout = timeout
+        self._touched = {}  # digest -> last access time not yet written
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key BLOB PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL,
+                tables TEXT NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+
+    # Return (True, result, seconds left) for a live entry, (False, None, 0) otherwise
+    def get(self, key):
+        digest = self._digest(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM results WHERE key = ? AND expires > ?",
+                (digest, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None, 0
+            self._touched[digest] = now
+            if len(self._touched) >= self.flush_every:
+                self._flush()
+            self.hits += 1
+        return True, decode_result(row[0]), row[1] - now
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    # Write pending access times, keeping them for the next try if the file
+    # is busy. Callers must hold the lock
+    def _flush(self):
+        if not self._touched:
+            return
+        try:
+            self._conn.executemany("UPDATE results SET accessed = ? WHERE key = ?",
+                                   [(now, digest) for digest, now in self._touched.items()])
+            self._conn.commit()
+        except sqlite3.Error:
+            self._conn.rollback()
+            return
+        self._touched.clear()
+
+    # Store a result, then drop expired and least recently used entries to fit
+    def set(self, key, result, ttl, tables):
+        try:
+            value = encode_result(result)
+        except TypeError:
+            return
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        digest = self._digest(key)
+        with self._lock:
+            try:
+                old = self._conn.execute("SELECT size FROM results WHERE key = ?",
+                                         (digest,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, value, len(value), now + ttl, now,
+                     ',' + ','.join(sorted(tables)) + ','))
+                self._touched.pop(digest, None)
+                self._bytes += len(value) - (old[0] if old else 0)
+                if self._bytes > self.max_bytes:
+                    self._flush()
+                    self._delete("expires <= ?", (now,))
+                    # Other processes may have removed entries meanwhile
+                    self._bytes = self._conn.execute(
+                        "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+                    while self._bytes > self.max_bytes:
+                        oldest, size = self._conn.execute(
+                            "SELECT key, size FROM results ORDER BY accessed LIMIT 1").fetchone()
+                        self._conn.execute("DELETE FROM results WHERE key = ?", (oldest,))
+                        self._bytes -= size
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+
+    # Delete the entries matching a WHERE clause and return their total size.
+    # Callers must hold the lock
+    def _delete(self, where, params):
+        size = self._conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM results WHERE {where}", params).fetchone()[0]
+        self._conn.execute(f"DELETE FROM results WHERE {where}", params)
+        return size
+
+    # Unlike lookups, invalidations wait for a busy file: skipping one would
+    # leave stale results behind
+    def invalidate_tables(self, *tables, timeout=5):
+        with self._lock:
+            self._conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+            try:
+                for table in tables:
+                    self._bytes -= self._delete("tables LIKE ?", (f'%,{table.lower()},%',))
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+            finally:
+                self._conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._touched.clear()
+            self._bytes = 0
+
+# One in-progress execution of a query that concurrent callers wait on
+class _Flight:
+    def __init__(self, generation):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.source = 'db'
+
+# Bounded LRU cache of query results with TTLs and table-based invalidation.
+# Expired entries are still served for stale_ttl seconds while a single
+# background refresh runs, and concurrent misses share one execution.
+class QueryCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300,
+                 stale_ttl=30, disk=None):
+        self.max_entries = max_entries
+        self.disk = disk  # optional DiskCache consulted after memory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (result, size, expires, tables)
+        self._bytes = 0
+        self._inflight = {}  # key -> _Flight
+        self._generation = 0  # bumped by invalidations
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(db_path, query, params=()):
+        # Named parameters come as a mapping, whose values must be in the key too
+        if isinstance(params, Mapping):
+            return (db_path, query, tuple(sorted(params.items())))
+        return (db_path, query, tuple(params))
+
+    # Return ('fresh' | 'stale' | None, result) and drop entries past their
+    # stale window. Callers must hold the lock
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        now = time.monotonic()
+        if entry[2] + self.stale_ttl <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None, None
+        self._entries.move_to_end(key)
+        return ('fresh' if entry[2] > now else 'stale'), entry[0]
+
+    # Return (True, result) for a live entry, (False, None) otherwise
+    def get(self, key):
+        with self._lock:
+            state, result = self._lookup(key)
+            if state == 'fresh':
+                self.hits += 1
+                return True, result
+            self.misses += 1
+            return False, None
+
+    # Return (outcome, result): a fresh hit, a stale hit (a background
+    # refresh is started unless one is running), or a miss where only the
+    # first caller runs compute() and the others wait for its result
+    def get_or_compute(self, key, compute, ttl=None, refresh=None):
+        with self._lock:
+            state, result = self._lookup(key)
+            if state == 'fresh':
+                self.hits += 1
+                return 'hit', result
+            if state == 'stale':
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    flight = self._inflight[key] = _Flight(self._generation)
+                    # Refreshes skip the disk tier, whose copy is as old
+                    threading.Thread(target=self._run, daemon=True,
+                                     args=(key, flight, refresh or compute, ttl, False)).start()
+                return 'stale', result
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight(self._generation)
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._run(key, flight, compute, ttl, True)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        if not leader:
+            return 'coalesced', flight.result
+        return ('disk' if flight.source == 'disk' else 'miss'), flight.result
+
+    # Execute one flight (from the disk tier when possible) and publish its
+    # result to the cache tiers and waiters
+    def _run(self, key, flight, compute, ttl, use_disk):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            found = False
+            if use_disk and self.disk is not None:
+                try:
+                    found, flight.result, remaining = self.disk.get(key)
+                except sqlite3.Error:
+                    pass  # e.g. locked by another process: a disk miss
+            if found:
+                flight.source = 'disk'
+                ttl = remaining
+            else:
+                flight.result = compute()
+            with self._lock:
+                # Results computed before an invalidation may already be stale
+                if flight.generation == self._generation:
+                    self.set(key, flight.result, ttl)
+            if not found and self.disk is not None:
+                with self._lock:
+                    current = flight.generation == self._generation
+                if current:
+                    try:
+                        self.disk.set(key, flight.result, ttl, query_tables(key[1]))
+                    except sqlite3.Error:
+                        pass  # the result is still good, it just isn't kept on disk
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    # Store a result, evicting least recently used entries to fit
+    def set(self, key, result, ttl=None, tables=None):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        tables = query_tables(key[1]) if tables is None else frozenset(tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, expires, tables)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    # Drop every entry that read from any of the given tables
+    def invalidate_tables(self, *tables):
+        tables = {table.lower() for table in tables}
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if entry[3] & tables]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        if self.disk is not None:
+            self.disk.invalidate_tables(*tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'disk_hits': self.disk.hits if self.disk else 0,
+                'disk_misses': self.disk.misses if self.disk else 0,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+
+query_cache = QueryCache()
+
+
+# Add a persistent tier to query_cache so results survive restarts
+def enable_disk_cache(path='query_cache.db', max_bytes=256 * 1024 * 1024):
+    query_cache.disk = DiskCache(path, max_bytes)
+    atexit.register(query_cache.disk.flush)
+    return query_cache.disk
+
+# Return the file path of the main database of a sqlite3 connection, or
+# None for in-memory and temporary databases, which are never cached.
+# Pooled connections carry the path they were opened on
+def connection_path(conn):
+    path = getattr(conn, 'path', None)
+    if path is None:
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path or None
@@ -1,16 +1,22 @@
 import mysql.connector
+import db_pool
+import seed
 
-def stream_users():
+def stream_users(streaming=False, fetch_size=1000):
     """
     Generator that yields user records one by one from the user_data table.
+    Both paths use mysql.connector's default unbuffered cursor, so neither
+    holds the whole result set. streaming=True additionally reads in
+    fetch_size chunks through seed.stream_rows, which closes the connection
+    even when the consumer stops early.
     """
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="yourpassword",  # 🔁 Replace with your actual MySQL password
-            database="ALX_prodev"
-        )
+        connection = db_pool.connect(db_pool.DATABASE)  # 🔁 Credentials come from MYSQL_* env vars
+        if streaming:
+            yield from seed.stream_rows(connection, "SELECT * FROM user_data",
+                                        fetch_size=fetch_size)
+            return
+
         cursor = connection.cursor()
         cursor.execute("SELECT * FROM user_data")
 
@@ -1,38 +1,191 @@
+import queue
+import threading
+from array import array
 import mysql.connector
+import db_pool
+import sinks
 
-def stream_users_in_batches(batch_size):
+try:
+    import numpy as np
+except ImportError:  # columnar batches fall back to array('d')
+    np = None
+
+_DONE = object()
+
+USER_COLUMNS = ('user_id', 'name', 'email', 'age')
+NUMERIC_COLUMNS = ('age',)
+SQL_OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+
+def _compile_query(columns=None, where=()):
     """
-    Generator that yields users in batches of size `batch_size`.
+    Builds the SELECT for stream_users_in_batches.
+    `columns` is the projection (defaults to every column). Each `where`
+    entry is either a (column, operator, value) tuple, compiled into a
+    parameterized WHERE clause, or a callable taking a row dict, which can't
+    be pushed down and is returned to be applied in Python.
+    Returns (query, params, python_filters).
     """
-    try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="yourpassword",  # 🔁 Change to your MySQL password
-            database="ALX_prodev"
-        )
-        cursor = connection.cursor(dictionary=True)
+    columns = tuple(columns or USER_COLUMNS)
+    for column in columns:
+        if column not in USER_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+
+    clauses, params, python_filters = [], [], []
+    for predicate in where:
+        if callable(predicate):
+            python_filters.append(predicate)
+            continue
+        column, operator, value = predicate
+        if column not in USER_COLUMNS or operator not in SQL_OPERATORS:
+            raise ValueError(f"Unsupported predicate: {predicate!r}")
+        clauses.append(f"{column} {operator} %s")
+        params.append(value)
 
-        cursor.execute("SELECT * FROM user_data")
+    query = f"SELECT {', '.join(columns)} FROM user_data"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    return query, tuple(params), python_filters
 
+
+def _fetch_batches(cursor, batch_size):
+    """
+    Yields fetchmany(batch_size) batches from cursor until it is exhausted.
+    """
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        yield batch
+
+
+def _prefetch(batches, depth):
+    """
+    Runs the batches generator on a background thread, keeping up to `depth`
+    batches queued ahead of the consumer. Errors are re-raised in the
+    consumer; stopping early tells the reader thread to quit.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def reader():
+        try:
+            for batch in batches:
+                while not stop.is_set():
+                    try:
+                        buffer.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            item = _DONE
+        except Exception as err:
+            item = err
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
         while True:
-            batch = cursor.fetchmany(batch_size)
-            if not batch:
+            item = buffer.get()
+            if item is _DONE:
                 break
-            yield batch  # 👈 Yield a full batch at once
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
 
-        cursor.close()
-        connection.close()
+
+def stream_users_in_batches(batch_size, prefetch=0, columns=None, where=(),
+                            raw=False):
+    """
+    Generator that yields users in batches of size `batch_size`.
+    With prefetch > 0 a background thread fetches the next batches (up to
+    `prefetch` of them) while the caller processes the current one.
+    `columns` and `where` are pushed into the query (see _compile_query);
+    callable predicates are applied to each batch in Python.
+    With raw=True rows are unconverted tuples of bytes instead of dicts.
+    """
+    query, params, python_filters = _compile_query(columns, where)
+    if raw and python_filters:
+        raise ValueError("Callable predicates need dict rows (raw=False)")
+
+    try:
+        connection = db_pool.connect(db_pool.DATABASE)  # 🔁 Credentials come from MYSQL_* env vars
+        if raw:
+            cursor = connection.cursor(raw=True)
+        else:
+            cursor = connection.cursor(dictionary=True)
+
+        cursor.execute(query, params)
+
+        batches = _fetch_batches(cursor, batch_size)
+        if prefetch > 0:
+            batches = _prefetch(batches, prefetch)
+        try:
+            for batch in batches:
+                for keep in python_filters:
+                    batch = [row for row in batch if keep(row)]
+                if batch:
+                    yield batch  # 👈 Yield a full batch at once
+            cursor.close()
+        finally:
+            # Also runs when the consumer stops early: stop the read-ahead
+            # thread before the connection it reads from goes away.
+            batches.close()
+            connection.close()
     except mysql.connector.Error as err:
         print(f"MySQL error: {err}")
         return
 
 
-def batch_processing(batch_size):
+def _to_column(values, numeric):
+    """
+    Converts one column of raw values into a columnar container: a float64
+    NumPy array (or array('d')) for numeric columns, a list of str
+    otherwise. NULLs become NaN / None. Raw values are bytes with the pure
+    Python connector but bytearray with its C extension, which NumPy would
+    read as arrays of character codes, so they are copied to bytes first.
+    """
+    if numeric:
+        if np is not None:
+            return np.array([b'nan' if v is None else bytes(v) for v in values]).astype(np.float64)
+        return array('d', (float('nan') if v is None else float(v) for v in values))
+    return [None if v is None else v.decode() for v in values]
+
+
+def stream_columns_in_batches(batch_size, columns=('age',), where=(), prefetch=0):
+    """
+    Columnar counterpart of stream_users_in_batches: yields one dict per
+    batch mapping each column name to its values. Numeric columns are
+    parsed straight from the wire bytes into float arrays, so reductions
+    such as sum() or mean() run over a whole batch at once.
+    Only pushed-down (column, operator, value) predicates are supported.
+    """
+    for batch in stream_users_in_batches(batch_size, prefetch, columns, where,
+                                         raw=True):
+        yield {
+            column: _to_column(values, column in NUMERIC_COLUMNS)
+            for column, values in zip(columns, zip(*batch))
+        }
+
+
+def batch_processing(batch_size, sink=None):
     """
-    Filters users over the age of 25 from each batch and prints them.
+    Prints users over the age of 25, batch by batch.
+    The age filter runs in MySQL, so other rows are never transferred.
+    Rows go to `sink` (see sinks.py) a batch at a time; by default they are
+    written to stdout in the same format as print(user).
     """
-    for batch in stream_users_in_batches(batch_size):  # Loop 1
-        for user in batch:  # Loop 2
-            if float(user['age']) > 25:
-                print(user)
+    sink = sink or sinks.StdoutSink()
+    with sink:
+        for batch in stream_users_in_batches(batch_size, where=[('age', '>', 25)]):  # Loop 1
+            sink.write_many(batch)  # Loop 2 happens inside the sink
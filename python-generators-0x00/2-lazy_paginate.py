@@ -1,27 +1,77 @@
 #!/usr/bin/python3
 seed = __import__('seed')
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset, connection=None):
     """
     Fetches a single page of users from the database.
+    Uses (and leaves open) connection when given, otherwise opens its own.
     """
-    connection = seed.connect_to_prodev()
+    own_connection = connection is None
+    if own_connection:
+        connection = seed.connect_to_prodev()
     cursor = connection.cursor(dictionary=True)
     cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
     rows = cursor.fetchall()
-    connection.close()
+    cursor.close()
+    if own_connection:
+        connection.close()
     return rows
 
 
-def lazy_pagination(page_size):
+def paginate_users_after(page_size, last_user_id=None, connection=None):
+    """
+    Fetches the page of users that follows last_user_id (keyset pagination).
+    Seeks on the primary key, so every page costs the same regardless of
+    how deep into the table it is.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = seed.connect_to_prodev()
+    cursor = connection.cursor(dictionary=True)
+    if last_user_id is None:
+        cursor.execute(
+            "SELECT * FROM user_data ORDER BY user_id LIMIT %s", (page_size,))
+    else:
+        cursor.execute(
+            "SELECT * FROM user_data WHERE user_id > %s "
+            "ORDER BY user_id LIMIT %s", (last_user_id, page_size))
+    rows = cursor.fetchall()
+    cursor.close()
+    if own_connection:
+        connection.close()
+    return rows
+
+
+def page_cursor(page):
+    """
+    Returns the resume token for a page: the last user_id it contains.
+    Pass it back as lazy_pagination(..., keyset=True, cursor=token).
+    """
+    return page[-1]['user_id'] if page else None
+
+
+def lazy_pagination(page_size, keyset=False, cursor=None, reuse_connection=False):
     """
     Generator that yields pages of users lazily.
     Only fetches the next page when needed.
+    With keyset=True pages are ordered by user_id and fetched with
+    WHERE user_id > last seen id; cursor resumes after a saved page_cursor().
+    With reuse_connection=True a single connection serves every page and is
+    closed when the generator is exhausted, closed or garbage-collected.
     """
+    connection = seed.connect_to_prodev() if reuse_connection else None
     offset = 0
-    while True:  # Only one loop
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
+    try:
+        while True:  # Only one loop
+            if keyset:
+                page = paginate_users_after(page_size, cursor, connection)
+            else:
+                page = paginate_users(page_size, offset, connection)
+            if not page:
+                break
+            yield page
+            offset += page_size
+            cursor = page_cursor(page)
+    finally:
+        if connection is not None:
+            connection.close()
@@ -1,12 +1,15 @@
 #!/usr/bin/python3
 import sys
+import sinks
 lazy_paginator = __import__('2-lazy_paginate').lazy_pagination
 
+# Pick the output with an argument: stdout (default), ndjson, csv or null
+sink = sinks.SINKS[sys.argv[1] if len(sys.argv) > 1 else 'stdout']()
 
 try:
-    for page in lazy_paginator(100):
-        for user in page:
-            print(user)
+    with sink:
+        for page in lazy_paginator(100):
+            sink.write_many(page)
 
 except BrokenPipeError:
-    sys.stderr.close()
\ No newline at end of file
+    sys.stderr.close()
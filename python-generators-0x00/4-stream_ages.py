@@ -1,13 +1,29 @@
 #!/usr/bin/python3
+import math
+import random
 import seed  # assumes seed.py contains connect_to_prodev()
+batches = __import__('1-batch_processing')
 
-def stream_user_ages():
+def stream_user_ages(streaming=False, fetch_size=1000, sample_rate=None):
     """
     Generator that yields user ages one by one from the database.
+    The default cursor is already unbuffered; streaming=True reads it in
+    fetch_size chunks and closes the connection on an early stop.
+    With sample_rate (0-1) MySQL only returns roughly that fraction of rows.
     """
+    query, params = "SELECT age FROM user_data", None
+    if sample_rate is not None:
+        query, params = query + " WHERE RAND() < %s", (sample_rate,)
+
     connection = seed.connect_to_prodev()
+    if streaming:
+        for row in seed.stream_rows(connection, query, params,
+                                    fetch_size=fetch_size):
+            yield float(row[0])
+        return
+
     cursor = connection.cursor()
-    cursor.execute("SELECT age FROM user_data")
+    cursor.execute(query, params)
 
     for row in cursor:
         yield float(row[0])  # Yield each age as float
@@ -16,16 +32,117 @@ def stream_user_ages():
     connection.close()
 
 
-def calculate_average_age():
+def _percentiles(sample, percentiles):
+    """
+    Nearest-rank percentiles of a list of ages, as {percentile: age}.
+    """
+    ordered = sorted(sample)
+    if not ordered:
+        return {p: None for p in percentiles}
+    return {
+        p: ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+        for p in percentiles
+    }
+
+
+def age_stats_sql(percentiles=(50, 90, 99), sample_size=10000):
+    """
+    Computes count/average/min/max of age with a single aggregate query.
+    Percentiles are approximated from a server-side random sample of about
+    `sample_size` ages, so only the sample crosses the wire.
+    """
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*), AVG(age), MIN(age), MAX(age) FROM user_data")
+    count, average, minimum, maximum = cursor.fetchone()
+    cursor.close()
+    connection.close()
+
+    stats = {
+        'count': count,
+        'average': float(average) if count else None,
+        'min': float(minimum) if count else None,
+        'max': float(maximum) if count else None,
+    }
+    if percentiles:
+        sample = []
+        if count:
+            rate = min(1.0, sample_size / count)
+            sample = list(stream_user_ages(streaming=True, sample_rate=rate))
+        stats['percentiles'] = _percentiles(sample, percentiles)
+    return stats
+
+
+def age_stats_stream(percentiles=(50, 90, 99), sample_size=10000):
+    """
+    Client-side counterpart of age_stats_sql for environments where
+    aggregates can't run in the database: one pass over the generator,
+    with a reservoir sample of `sample_size` ages for the percentiles.
+    """
+    count, total = 0, 0.0
+    minimum = maximum = None
+    reservoir = []
+
+    for age in stream_user_ages(streaming=True):
+        count += 1
+        total += age
+        minimum = age if minimum is None else min(minimum, age)
+        maximum = age if maximum is None else max(maximum, age)
+        if len(reservoir) < sample_size:
+            reservoir.append(age)
+        else:
+            slot = random.randrange(count)
+            if slot < sample_size:
+                reservoir[slot] = age
+
+    stats = {
+        'count': count,
+        'average': total / count if count else None,
+        'min': minimum,
+        'max': maximum,
+    }
+    if percentiles:
+        stats['percentiles'] = _percentiles(reservoir, percentiles)
+    return stats
+
+
+def sum_ages_vectorized(batch_size=10000):
+    """
+    Returns (total, count) of all ages using columnar batches, so each
+    batch is summed in one vectorized call instead of row by row.
+    """
+    total = 0.0
+    count = 0
+    for batch in batches.stream_columns_in_batches(batch_size, columns=('age',)):
+        ages = batch['age']
+        total += float(ages.sum()) if batches.np is not None else sum(ages)
+        count += len(ages)
+    return total, count
+
+
+def calculate_average_age(use_sql=False, vectorized=False):
     """
     Uses the generator to compute the average age efficiently.
+    With use_sql=True MySQL computes it with AVG() instead; with
+    vectorized=True ages are summed per columnar batch.
     """
+    if use_sql:
+        average = age_stats_sql(percentiles=())['average']
+        if average is None:
+            print("No users found.")
+        else:
+            print(f"Average age of users: {average:.2f}")
+        return
+
     total = 0
     count = 0
 
-    for age in stream_user_ages():  # First and only loop
-        total += age
-        count += 1
+    if vectorized:
+        total, count = sum_ages_vectorized()
+    else:
+        for age in stream_user_ages():  # First and only loop
+            total += age
+            count += 1
 
     if count > 0:
         average = total / count
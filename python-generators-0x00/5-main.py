@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+import multiprocessing
+import resource
+import sys
+import db_pool
+stream_users = __import__('0-stream_users').stream_users
+
+# Stream the whole table and check that peak RSS stays flat as rows go by,
+# next to a buffered=True cursor that holds the full result set client-side.
+# Each run gets its own process, since ru_maxrss is a per-process high-water
+# mark reported in kilobytes on Linux.
+
+TOLERANCE_KB = 4096  # allowed streaming growth after the first checkpoint
+CHECKPOINTS = {1000, 10000, 100000, 1000000, 10000000}
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def buffered_users():
+    connection = db_pool.connect(db_pool.DATABASE)
+    cursor = connection.cursor(buffered=True)
+    cursor.execute("SELECT * FROM user_data")
+    yield from cursor
+    cursor.close()
+    connection.close()
+
+
+READERS = {
+    'streaming': lambda: stream_users(streaming=True, fetch_size=1000),
+    'buffered': buffered_users,
+}
+
+
+def measure(name, results):
+    """
+    Child process: reads every row with one reader and sends back
+    (rows, peak RSS before the query, [(checkpoint, peak RSS)]).
+    """
+    start = peak_rss_kb()
+    count = 0
+    seen = []
+    for _ in READERS[name]():
+        count += 1
+        if count in CHECKPOINTS:
+            seen.append((count, peak_rss_kb()))
+    results.send((count, start, seen))
+    results.close()
+
+
+def run(name):
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('fork').Process(target=measure, args=(name, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        process.join()
+        sys.exit(f"{name} reader failed (exit code {process.exitcode})")
+    finally:
+        parent.close()
+    process.join()
+    return result
+
+
+# A buffered cursor has the whole table in memory before its first row, so
+# growth is measured from before the query; the streaming reader must also
+# stay flat between checkpoints
+growth = {}
+for name in READERS:
+    count, start, seen = run(name)
+    for rows, rss in seen:
+        print(f"{name:>9} {rows:>10} rows, peak RSS {rss} KB (+{rss - start} KB)")
+    if len(seen) < 2:
+        print(f"Only {count} rows: at least {sorted(CHECKPOINTS)[1]} are needed "
+              "to compare two checkpoints")
+        sys.exit(1)
+    growth[name] = seen[-1][1] - start
+    if name == 'streaming':
+        flat = seen[-1][1] - seen[0][1]
+
+print(f"Peak RSS growth over the whole table: streaming +{growth['streaming']} KB, "
+      f"buffered +{growth['buffered']} KB")
+if flat > TOLERANCE_KB:
+    print("Memory grew with table size while streaming")
+    sys.exit(1)
@@ -0,0 +1,27 @@
+#!/usr/bin/python3
+import asyncio
+import sys
+stream_users = __import__('0-stream_users').stream_users
+lazy_pagination = __import__('2-lazy_paginate').lazy_pagination
+async_stream = __import__('async_stream')
+
+# Check that the async generators return exactly what the sync ones do.
+# SELECT * has no defined order, so full-table rows are compared sorted by
+# user_id; keyset pages are already ordered. Exits 1 on any mismatch.
+
+
+async def main():
+    sync_rows = sorted(stream_users(streaming=True))
+    async_rows = sorted([row async for row in async_stream.astream_users()])
+    rows_match = sync_rows == async_rows
+    print(f"astream_users parity: {rows_match} ({len(async_rows)} rows)")
+
+    sync_pages = list(lazy_pagination(100, keyset=True))
+    async_pages = [page async for page in async_stream.alazy_pagination(100, keyset=True)]
+    pages_match = sync_pages == async_pages
+    print(f"alazy_pagination parity: {pages_match} ({len(async_pages)} pages)")
+    return rows_match and pages_match
+
+
+if not asyncio.run(main()):
+    sys.exit(1)
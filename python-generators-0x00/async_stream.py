@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+from contextlib import aclosing
+import db_pool
+
+try:
+    import aiomysql
+except ImportError:  # only needed for the MySQL backend
+    aiomysql = None
+
+try:
+    import aiosqlite
+except ImportError:  # only needed for the SQLite stand-in
+    aiosqlite = None
+
+USER_COLUMNS = ('user_id', 'name', 'email', 'age')
+
+
+async def _connect(sqlite_path=None):
+    """
+    Opens an async connection to ALX_prodev with aiomysql, or to the local
+    SQLite copy at sqlite_path with aiosqlite.
+    """
+    if sqlite_path is not None:
+        if aiosqlite is None:
+            raise RuntimeError("The SQLite stand-in needs the aiosqlite package")
+        return await aiosqlite.connect(sqlite_path)
+    if aiomysql is None:
+        raise RuntimeError("Async MySQL streaming needs the aiomysql package")
+    config = db_pool.MYSQL_CONFIG
+    return await aiomysql.connect(host=config['host'], user=config['user'],
+                                  password=config['password'], db=db_pool.DATABASE)
+
+
+async def _close(connection):
+    # aiosqlite's close() is a coroutine, aiomysql's drops the socket at once
+    if aiosqlite is not None and isinstance(connection, aiosqlite.Connection):
+        await connection.close()
+    else:
+        connection.close()
+
+
+async def _rows(connection, query, params=(), fetch_size=1000):
+    """
+    Async generator over the tuples of query on connection, holding at most
+    fetch_size rows. Rows are only read as the consumer asks for them, so a
+    slow consumer slows the reads down instead of filling memory.
+    MySQL uses an unbuffered server-side cursor. Callers wrap the generator
+    in aclosing() so an early stop or cancellation cleans up at once: closing
+    an SSCursor reads and discards every unread row, so in that case the
+    MySQL connection is closed instead, which drops the socket.
+    """
+    sqlite = aiosqlite is not None and isinstance(connection, aiosqlite.Connection)
+    if sqlite:
+        cursor = await connection.cursor()
+        query = query.replace('%s', '?')
+    else:
+        cursor = await connection.cursor(aiomysql.SSCursor)
+    finished = False
+    try:
+        await cursor.execute(query, params)
+        while True:
+            rows = await cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row)
+        finished = True
+    finally:
+        if finished or sqlite:
+            await cursor.close()
+        else:
+            connection.close()
+
+
+async def astream_users(fetch_size=1000, sqlite_path=None):
+    """
+    Async counterpart of stream_users(streaming=True): yields user rows one
+    by one without blocking the event loop. The connection is closed when
+    the generator finishes, is closed early (use contextlib.aclosing) or
+    its task is cancelled.
+    """
+    connection = await _connect(sqlite_path)
+    try:
+        async with aclosing(_rows(connection, "SELECT * FROM user_data",
+                                  fetch_size=fetch_size)) as rows:
+            async for row in rows:
+                yield row
+    finally:
+        await _close(connection)
+
+
+async def astream_user_ages(fetch_size=1000, sqlite_path=None):
+    """
+    Async counterpart of stream_user_ages: yields each age as a float.
+    """
+    connection = await _connect(sqlite_path)
+    try:
+        async with aclosing(_rows(connection, "SELECT age FROM user_data",
+                                  fetch_size=fetch_size)) as rows:
+            async for (age,) in rows:
+                yield float(age)
+    finally:
+        await _close(connection)
+
+
+async def alazy_pagination(page_size, keyset=False, cursor=None, sqlite_path=None):
+    """
+    Async counterpart of lazy_pagination(reuse_connection=True): yields
+    pages (lists of user dicts) over a single connection, fetching each
+    page only when the consumer asks for it. keyset and cursor work as in
+    lazy_pagination.
+    """
+    connection = await _connect(sqlite_path)
+    offset = 0
+    try:
+        while True:
+            if keyset and cursor is not None:
+                query = ("SELECT * FROM user_data WHERE user_id > %s "
+                         "ORDER BY user_id LIMIT %s")
+                params = (cursor, page_size)
+            elif keyset:
+                query = "SELECT * FROM user_data ORDER BY user_id LIMIT %s"
+                params = (page_size,)
+            else:
+                query = "SELECT * FROM user_data LIMIT %s OFFSET %s"
+                params = (page_size, offset)
+            async with aclosing(_rows(connection, query, params, page_size)) as rows:
+                page = [dict(zip(USER_COLUMNS, row)) async for row in rows]
+            if not page:
+                break
+            yield page
+            offset += page_size
+            cursor = page[-1]['user_id']
+    finally:
+        await _close(connection)
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+import db_pool
+import seed
+stream_users = __import__('0-stream_users').stream_users
+batches = __import__('1-batch_processing')
+lazy_pagination = __import__('2-lazy_paginate').lazy_pagination
+stream_user_ages = __import__('4-stream_ages').stream_user_ages
+
+# Everything runs against a separate database so user_data in ALX_prodev
+# is never touched
+BENCH_DATABASE = os.environ.get('BENCH_DATABASE', 'ALX_prodev_bench')
+
+SIZES = (10_000, 1_000_000, 10_000_000)
+OFFSET_PAGINATION_LIMIT = 1_000_000  # OFFSET walks are quadratic beyond this
+
+# Each pattern returns an iterator and how many rows one item stands for
+PATTERNS = {
+    'stream_users': lambda: (stream_users(), None),
+    'stream_users_streaming': lambda: (stream_users(streaming=True), None),
+    'stream_users_in_batches': lambda: (batches.stream_users_in_batches(1000), len),
+    'stream_users_in_batches_prefetch': lambda: (
+        batches.stream_users_in_batches(1000, prefetch=2), len),
+    'lazy_pagination': lambda: (lazy_pagination(1000), len),
+    'lazy_pagination_keyset': lambda: (
+        lazy_pagination(1000, keyset=True, reuse_connection=True), len),
+    'stream_user_ages': lambda: (stream_user_ages(), None),
+}
+
+
+def _questions():
+    """
+    Server-wide count of statements received, used to count round trips.
+    """
+    connection = seed.connect_db()
+    cursor = connection.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    value = int(cursor.fetchone()[1])
+    cursor.close()
+    connection.close()
+    return value
+
+
+def seed_rows(count, chunk_size=5000):
+    """
+    Recreates user_data in the benchmark database with `count` synthetic
+    users, using the batched insert path.
+    """
+    connection = seed.connect_db()
+    seed.create_database(connection)
+    connection.close()
+
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS user_data")
+    cursor.close()
+    seed.create_table(connection)
+
+    rng = random.Random(count)
+    rows = (
+        (str(uuid.UUID(int=rng.getrandbits(128), version=4)), f"User {i}",
+         f"user{i}@example.com", rng.randint(1, 120))
+        for i in range(count)
+    )
+    cursor = connection.cursor()
+    for chunk in seed._chunks(rows, chunk_size):
+        seed._insert_chunk(cursor, chunk)
+        connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def _measure(name, results):
+    """
+    Child process: runs one access pattern to completion and sends back its
+    timings and peak RSS, so each pattern gets its own memory high-water mark.
+    """
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    items, weight = PATTERNS[name]()
+    rows = 0
+    first_row = None
+    start = time.perf_counter()
+    for item in items:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += weight(item) if weight else 1
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.send({
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else None,
+        'time_to_first_row': first_row,
+        'peak_rss_kb': peak,
+        'rss_growth_kb': peak - rss_before,
+    })
+
+
+def run_pattern(name):
+    """
+    Runs one pattern in a forked process and adds its round-trip count.
+    Raises RuntimeError if the child dies without reporting.
+    """
+    before = _questions()
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('fork').Process(
+        target=_measure, args=(name, child))
+    process.start()
+    # Only the child may hold the sending end, so its exit ends recv()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"{name} failed in the benchmark process "
+                           f"(exit code {process.exitcode})") from None
+    finally:
+        parent.close()
+    process.join()
+    # Minus the SHOW GLOBAL STATUS issued by the second _questions() call
+    result['round_trips'] = _questions() - before - 1
+    return result
+
+
+def benchmark(sizes=SIZES, patterns=None):
+    """
+    Seeds each size in turn, runs every access pattern on it and returns
+    the results as {size: {pattern: metrics}}. Helpers use BENCH_DATABASE
+    only while this runs.
+    """
+    database, db_pool.DATABASE = db_pool.DATABASE, BENCH_DATABASE
+    report = {}
+    try:
+        for size in sizes:
+            seed_rows(size)
+            report[size] = {}
+            for name in patterns or PATTERNS:
+                if name == 'lazy_pagination' and size > OFFSET_PAGINATION_LIMIT:
+                    report[size][name] = {'skipped': 'OFFSET pagination is quadratic'}
+                    continue
+                report[size][name] = run_pattern(name)
+                print(f"{size:>10} {name:<34} {report[size][name]['rows_per_sec']:,.0f} rows/sec",
+                      file=sys.stderr)
+    finally:
+        db_pool.DATABASE = database
+    return report
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    json.dump(benchmark(sizes), sys.stdout, indent=2)
+    print()
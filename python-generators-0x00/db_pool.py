@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+import os
+import threading
+import time
+import mysql.connector
+from mysql.connector import errors
+
+# ⚙️ Connection settings, overridable through the environment
+MYSQL_CONFIG = {
+    'host': os.environ.get('MYSQL_HOST', 'localhost'),
+    'user': os.environ.get('MYSQL_USER', 'root'),
+    'password': os.environ.get('MYSQL_PASSWORD', 'yourpassword'),
+}
+DATABASE = os.environ.get('MYSQL_DATABASE', 'ALX_prodev')
+POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 5))
+POOL_MAX_OVERFLOW = int(os.environ.get('MYSQL_POOL_MAX_OVERFLOW', 10))
+POOL_RECYCLE = float(os.environ.get('MYSQL_POOL_RECYCLE', 3600))
+POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 30))
+
+
+class PooledConnection:
+    """
+    Wraps a mysql.connector connection borrowed from a ConnectionPool.
+    Behaves like the connection itself, except that close() hands it back
+    to the pool instead of disconnecting.
+    """
+
+    _connection = None
+
+    def __init__(self, pool, connection, created):
+        self._pool = pool
+        self._connection = connection
+        self._created = created
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        if self._connection is not None:
+            self._pool.release(self._connection, self._created)
+            self._connection = None
+
+    def __del__(self):
+        # A generator abandoned mid-stream must not starve the pool
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of connections to one database.
+    Keeps up to `size` idle connections and allows `max_overflow` extra
+    ones under load; further borrowers wait up to `timeout` seconds.
+    Idle connections are pinged before being handed out and replaced once
+    older than `recycle` seconds.
+    """
+
+    def __init__(self, database=None, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+                 recycle=POOL_RECYCLE, timeout=POOL_TIMEOUT, **options):
+        self.database = database
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.timeout = timeout
+        self.options = options
+        self._idle = []  # (connection, created) pairs
+        self._in_use = 0
+        self._lock = threading.Condition()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.discarded = 0
+
+    def _connect(self):
+        config = dict(MYSQL_CONFIG, **self.options)
+        if self.database:
+            config['database'] = self.database
+        return mysql.connector.connect(**config)
+
+    def _check_fork(self):
+        # Sockets inherited from a parent process must not be shared
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._in_use = 0
+
+    def _discard(self, connection):
+        self.discarded += 1
+        try:
+            connection.close()
+        except errors.Error:
+            pass
+
+    def acquire(self):
+        """
+        Borrows a connection, reusing a healthy idle one when possible.
+        Raises mysql.connector.errors.PoolError if none frees up in time.
+        """
+        with self._lock:
+            self._check_fork()
+            start = time.perf_counter()
+            waited = False
+            try:
+                while True:
+                    while self._idle:
+                        connection, created = self._idle.pop()
+                        if (time.time() - created > self.recycle
+                                or not connection.is_connected()):
+                            self._discard(connection)
+                            continue
+                        self.hits += 1
+                        self._in_use += 1
+                        return PooledConnection(self, connection, created)
+                    if self._in_use < self.size + self.max_overflow:
+                        self.misses += 1
+                        self._in_use += 1
+                        break
+                    remaining = self.timeout - (time.perf_counter() - start)
+                    if remaining <= 0:
+                        raise errors.PoolError("Connection pool exhausted")
+                    waited = True
+                    self._lock.wait(remaining)
+            finally:
+                if waited:
+                    self.waits += 1
+                    self.wait_time += time.perf_counter() - start
+
+        # Open the new connection outside the lock
+        try:
+            return PooledConnection(self, self._connect(), time.time())
+        except errors.Error:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, connection, created):
+        """
+        Takes a connection back. Connections with unread results, or beyond
+        the idle limit, are closed instead of being kept.
+        """
+        with self._lock:
+            self._check_fork()
+            self._in_use = max(0, self._in_use - 1)
+            keep = len(self._idle) < self.size and not connection.unread_result
+            if keep and connection.in_transaction:
+                try:
+                    connection.rollback()
+                except errors.Error:
+                    keep = False
+            if keep:
+                self._idle.append((connection, created))
+            else:
+                self._discard(connection)
+            self._lock.notify()
+
+    def stats(self):
+        """
+        Returns the pool's counters as a dict for monitoring.
+        """
+        with self._lock:
+            return {
+                'database': self.database,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'discarded': self.discarded,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database=None, **options):
+    """
+    Returns the shared pool for database and connector options,
+    creating it on first use.
+    """
+    key = (database, tuple(sorted(options.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(database, **options)
+        return _pools[key]
+
+
+def connect(database=None, **options):
+    """
+    Borrows a connection from the shared pool; close() returns it.
+    """
+    return get_pool(database, **options).acquire()
+
+
+def pool_stats():
+    """
+    Returns the counters of every pool created so far.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
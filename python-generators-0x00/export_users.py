@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+import csv
+import gzip
+import io
+import os
+import sys
+import time
+import db_pool
+import seed
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+HEADER = ('user_id', 'name', 'email', 'age')
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def _open_output(path, compression):
+    """
+    Opens the binary stream rows are written to: `path` ('-' for stdout),
+    wrapped in a gzip or zstd compressor when asked.
+    Returns (stream, closers) where closers must be closed in order.
+    """
+    # Validate first so a bad codec doesn't leave an empty output file behind
+    if compression not in (None, 'gzip', 'zstd'):
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression needs the zstandard package")
+
+    if path == '-':
+        raw = sys.stdout.buffer
+        closers = []
+    else:
+        raw = open(path, 'wb')
+        closers = [raw]
+
+    if compression is None:
+        return raw, closers
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=raw, mode='wb')
+    else:
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return stream, [stream] + closers
+
+
+def export_users(path, compression=None, flush_size=1 << 20, fetch_size=1000):
+    """
+    Streams every row of user_data into a CSV file without materialising
+    the table: rows are formatted into an in-memory buffer that is encoded
+    and written out (through the compressor, if any) every `flush_size`
+    bytes. Prints and returns the throughput in MB/s of CSV produced.
+    The file is written as `path`.tmp and only renamed to `path` once
+    complete; database errors propagate and leave `path` untouched.
+    """
+    if compression is None:
+        for suffix, name in COMPRESSION_SUFFIXES.items():
+            if path.endswith(suffix):
+                compression = name
+
+    connection = db_pool.connect(db_pool.DATABASE)
+    target = path if path == '-' else f"{path}.tmp"
+    try:
+        stream, closers = _open_output(target, compression)
+    except BaseException:
+        connection.close()
+        raise
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    rows = 0
+    written = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal written
+        data = buffer.getvalue().encode('utf-8')
+        stream.write(data)
+        written += len(data)
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Unlike stream_users(), stream_rows() lets database errors through, so
+    # a failed read never looks like a finished export
+    users = seed.stream_rows(connection, "SELECT * FROM user_data", fetch_size=fetch_size)
+    try:
+        try:
+            for user in users:
+                writer.writerow(user)
+                rows += 1
+                if buffer.tell() >= flush_size:
+                    flush()
+            flush()
+        finally:
+            users.close()  # returns the connection if the export failed midway
+            for closer in closers:
+                closer.close()
+    except BaseException:
+        if target != path:
+            os.remove(target)
+        raise
+    if target != path:
+        os.replace(target, path)
+
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed / 1e6 if elapsed > 0 else float('inf')
+    print(f"Exported {rows} rows ({written / 1e6:.1f} MB) in {elapsed:.2f}s "
+          f"({rate:.1f} MB/s)", file=sys.stderr)
+    return rate
+
+
+if __name__ == "__main__":
+    export_users(sys.argv[1] if len(sys.argv) > 1 else '-')
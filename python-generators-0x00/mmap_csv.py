@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+import csv
+import mmap
+import os
+
+
+def _split_line(text, columns):
+    """
+    Splits one CSV record into a tuple of fields. Plain and fully quoted
+    records are split directly; anything else (escaped quotes, embedded
+    separators) goes through the csv module.
+    """
+    if '"' not in text:
+        return tuple(text.split(','))
+    if text[0] == '"' and text[-1] == '"' and text.count('"') == 2 * columns:
+        return tuple(text[1:-1].split('","'))
+    return tuple(next(csv.reader([text])))
+
+
+def line_ranges(csv_file, parts):
+    """
+    Splits the records after the header into up to `parts` contiguous
+    (start, end) byte ranges whose boundaries fall on line starts.
+    Assumes quoted fields don't contain newlines.
+    """
+    size = os.path.getsize(csv_file)
+    if size == 0:
+        return []
+    with open(csv_file, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        first = mapped.find(b'\n') + 1 or size
+        step = max(1, (size - first) // parts)
+        bounds = [first]
+        while bounds[-1] < size:
+            cut = mapped.find(b'\n', min(size, bounds[-1] + step) - 1)
+            bounds.append(size if cut == -1 else cut + 1)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def read_rows(csv_file, start=0, end=None, columns=None):
+    """
+    Generator over a CSV file through a read-only memory map.
+    The first item is the header tuple, then one tuple of str per record.
+    Records are located with find() on the mapping and decoded straight
+    from memoryview slices, without building a dict per row or copying
+    lines into intermediate bytes objects.
+    Given a (start, end) range from line_ranges() and the number of
+    `columns`, only the records in that range are yielded, with no header.
+    """
+    if os.path.getsize(csv_file) == 0:
+        return
+    with open(csv_file, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            size = len(mapped) if end is None else end
+            while start < size:
+                stop = mapped.find(b'\n', start, size)
+                if stop == -1:
+                    stop = size
+                text = str(view[start:stop], 'utf-8')
+                # A quoted field may contain newlines: extend the record
+                # until its quotes are balanced.
+                while text.count('"') % 2 and stop < size:
+                    stop = mapped.find(b'\n', stop + 1, size)
+                    if stop == -1:
+                        stop = size
+                    text = str(view[start:stop], 'utf-8')
+                text = text.rstrip('\r')
+                start = stop + 1
+                if not text:
+                    continue
+                if columns is None:
+                    header = _split_line(text, text.count(',') + 1)
+                    columns = len(header)
+                    yield header
+                else:
+                    yield _split_line(text, columns)
+        finally:
+            view.release()
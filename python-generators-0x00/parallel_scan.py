@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import seed
+
+UUID_SPACE = 16 ** 8  # user_ids are split on their first 8 hex digits
+
+
+def uuid_ranges(buckets):
+    """
+    Splits the UUID key space into `buckets` contiguous [low, high) ranges
+    of user_id prefixes. The first low and the last high are None (open).
+    """
+    bounds = [f"{i * UUID_SPACE // buckets:08x}" for i in range(1, buckets)]
+    lows = [None] + bounds
+    highs = bounds + [None]
+    return list(zip(lows, highs))
+
+
+def scan_range(bounds):
+    """
+    Worker: fetches every user whose user_id falls in bounds, in key order,
+    over its own connection. Returns the rows as a list of tuples.
+    """
+    low, high = bounds
+    clauses, params = [], []
+    if low is not None:
+        clauses.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        clauses.append("user_id < %s")
+        params.append(high)
+    query = "SELECT * FROM user_data"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY user_id"
+
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    connection.close()
+    return rows
+
+
+def parallel_scan(workers=4, buckets=None, ordered=False):
+    """
+    Generator that yields every user row, scanning user_id ranges in
+    `workers` processes. The table is cut into `buckets` ranges (default
+    16 per worker) and at most two ranges per worker are in flight, so only
+    a few ranges are held in memory at once.
+    With ordered=True rows come out in user_id order, otherwise each range
+    is yielded as soon as it is ready.
+    """
+    ranges = deque(uuid_ranges(buckets or workers * 16))
+    max_in_flight = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < max_in_flight:
+                    pending.append(executor.submit(scan_range, ranges.popleft()))
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def benchmark(workers=(1, 2, 4, 8)):
+    """
+    Times a full-table scan with the serial stream_users generator against
+    parallel_scan at each degree of parallelism, printing rows/sec.
+    """
+    stream_users = __import__('0-stream_users').stream_users
+
+    def timed(label, rows):
+        start = time.perf_counter()
+        count = sum(1 for _ in rows)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed > 0 else float('inf')
+        print(f"{label:<24} {count} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+    timed("serial stream_users", stream_users(streaming=True))
+    for n in workers:
+        timed(f"parallel_scan({n})", parallel_scan(workers=n))
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import mmap_csv
+import seed
+
+
+def ingest_range(csv_file, start, end, header, chunk_size=1000, upsert=False,
+                 table='user_data'):
+    """
+    Worker: inserts the CSV records between byte offsets start and end into
+    table over its own connection, as a single transaction.
+    Returns (rows read, rows affected).
+    """
+    rows = mmap_csv.read_rows(csv_file, start, end, len(header))
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    total = 0
+    affected = 0
+    try:
+        for chunk in seed._chunks(seed._tuple_values(header, rows), chunk_size):
+            affected += seed._insert_chunk(cursor, chunk, upsert, table)
+            total += len(chunk)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+    return total, affected
+
+
+def _count_rows(table):
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    (count,) = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return count
+
+
+def parallel_insert_data(csv_file, workers=4, chunk_size=1000, upsert=False,
+                         table='user_data'):
+    """
+    Splits csv_file into `workers` line-aligned byte ranges and loads them
+    concurrently, one process, connection and transaction per range.
+    Afterwards reconciles the load: the workers must have read exactly the
+    records of a separate full pass over the CSV, and the rows the table
+    gained must match the inserts the workers reported (for plain inserts)
+    and never exceed the CSV. Raises RuntimeError on a mismatch.
+    Returns the number of CSV rows ingested.
+    """
+    records = mmap_csv.read_rows(csv_file)
+    header = next(records, ())
+    expected = sum(1 for _ in records)
+    ranges = mmap_csv.line_ranges(csv_file, workers)
+    before = _count_rows(table)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(ingest_range, csv_file, low, high, header,
+                            chunk_size, upsert, table)
+            for low, high in ranges
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    total = sum(rows for rows, _ in results)
+    affected = sum(count for _, count in results)
+    rate = total / elapsed if elapsed > 0 else float('inf')
+    print(f"{workers} workers loaded {total} rows ({affected} affected) "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+    added = _count_rows(table) - before
+    problems = []
+    if total != expected:
+        problems.append(f"workers read {total} of {expected} CSV rows")
+    if added > expected:
+        problems.append(f"{table} gained {added} rows from {expected} CSV rows")
+    # Upserts count updated rows twice, so only plain inserts are comparable
+    if not upsert and added != affected:
+        problems.append(f"workers inserted {affected} rows but {table} gained {added}")
+    if problems:
+        raise RuntimeError("Row count mismatch: " + "; ".join(problems))
+    print(f"Reconciled: {expected} rows in CSV, {total} read, {added} added to {table}")
+    return total
+
+
+def benchmark(csv_file='user_data.csv', workers=(1, 2, 4, 8)):
+    """
+    Loads csv_file into an empty scratch copy of user_data with 1 to 8
+    workers to show how ingestion scales. user_data itself is untouched.
+    """
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS user_data_bench LIKE user_data")
+    try:
+        for n in workers:
+            cursor.execute("TRUNCATE TABLE user_data_bench")
+            parallel_insert_data(csv_file, workers=n, table='user_data_bench')
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS user_data_bench")
+        cursor.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    benchmark(*sys.argv[1:2])
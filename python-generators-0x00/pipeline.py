@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+# No stage holds more than this many items at once unless told otherwise
+MAX_BUFFER = 10000
+
+
+def pipe(source, *stages):
+    """
+    Chains stages over a source iterable, e.g.
+    pipe(stream_users(), filtered(is_adult), mapped(to_csv), batched(500)).
+    Every stage is a function taking an iterable and returning a generator,
+    so nothing runs until the result is iterated.
+    """
+    for stage in stages:
+        source = stage(source)
+    return source
+
+
+def _check_buffer(size, max_buffer):
+    if size > max_buffer:
+        raise ValueError(f"Stage would buffer {size} items, limit is {max_buffer}")
+
+
+def filtered(predicate):
+    """
+    Stage keeping only the items for which predicate(item) is true.
+    """
+    def stage(items):
+        for item in items:
+            if predicate(item):
+                yield item
+    return stage
+
+
+def mapped(function):
+    """
+    Stage yielding function(item) for every item.
+    """
+    def stage(items):
+        for item in items:
+            yield function(item)
+    return stage
+
+
+def batched(size, max_buffer=MAX_BUFFER):
+    """
+    Stage grouping items into lists of `size` (the last may be shorter).
+    """
+    _check_buffer(size, max_buffer)
+
+    def stage(items):
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+    return stage
+
+
+def windowed(size, step=1, max_buffer=MAX_BUFFER):
+    """
+    Stage yielding sliding windows (tuples) of `size` consecutive items,
+    advancing `step` items each time. Trailing items that don't fill a
+    window are dropped.
+    """
+    _check_buffer(size, max_buffer)
+
+    def stage(items):
+        window = deque(maxlen=size)
+        for count, item in enumerate(items, 1):
+            window.append(item)
+            # The window now starts at item count - size
+            if count >= size and (count - size) % step == 0:
+                yield tuple(window)
+    return stage
+
+
+def tee(*sinks):
+    """
+    Stage passing every item to each sink(item) on its way through, e.g.
+    to write an export while the pipeline keeps going. Buffers nothing.
+    """
+    def stage(items):
+        for item in items:
+            for sink in sinks:
+                sink(item)
+            yield item
+    return stage
+
+
+def parallel_map(function, workers=4, processes=False, ordered=True, max_buffer=None):
+    """
+    Stage yielding function(item) computed on a thread pool (or a process
+    pool with processes=True; function and items must then be picklable).
+    At most `max_buffer` items (default 2 per worker) are in flight, so a
+    slow consumer holds the source back instead of queueing everything.
+    With ordered=False results are yielded as soon as they are ready.
+    """
+    max_buffer = max_buffer or workers * 2
+    _check_buffer(max_buffer, MAX_BUFFER)
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    def stage(items):
+        iterator = iter(items)
+        with pool(max_workers=workers) as executor:
+            pending = deque()
+            try:
+                for item in iterator:
+                    pending.append(executor.submit(function, item))
+                    if len(pending) < max_buffer:
+                        continue
+                    if ordered:
+                        yield pending.popleft().result()
+                    else:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            pending.remove(future)
+                            yield future.result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+    return stage
@@ -1,16 +1,20 @@
 import mysql.connector
 import csv
+import db_pool
+import hashlib
+import mmap_csv
 import os
+import tempfile
+import time
 import uuid
+from itertools import islice
 
 # 🔌 Connect to MySQL server (no specific database)
+# Connections come from the shared pool in db_pool.py (credentials are read
+# from MYSQL_HOST / MYSQL_USER / MYSQL_PASSWORD); close() returns them.
 def connect_db():
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",           # Change if you use a different MySQL user
-            password="yourpassword" # <-- Change this to your MySQL password
-        )
+        connection = db_pool.connect()
         return connection
     except mysql.connector.Error as err:
         print(f"Error connecting to MySQL: {err}")
@@ -19,42 +23,192 @@ def connect_db():
 # 🏗️ Create database ALX_prodev if not exists
 def create_database(connection):
     cursor = connection.cursor()
-    cursor.execute("CREATE DATABASE IF NOT EXISTS ALX_prodev")
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_pool.DATABASE}")
     cursor.close()
 
 # 🔌 Connect directly to ALX_prodev database
-def connect_to_prodev():
+def connect_to_prodev(**options):
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",           # Change if you use a different MySQL user
-            password="yourpassword", # <-- Change this to your MySQL password
-            database="ALX_prodev"
-        )
+        # Extra options (e.g. allow_local_infile=True) get their own pool
+        connection = db_pool.connect(db_pool.DATABASE, **options)
         return connection
     except mysql.connector.Error as err:
         print(f"Error connecting to ALX_prodev: {err}")
         return None
 
+# 🌊 Stream a query's rows with an unbuffered cursor
+def stream_rows(connection, query, params=None, fetch_size=1000, dictionary=False):
+    """
+    Generator that yields the rows of query one by one while holding at most
+    fetch_size rows in client memory. The cursor is unbuffered (as is
+    mysql.connector's default; buffered=False just makes that explicit), so
+    rows are read off the socket as they are consumed instead of all up front.
+    Takes ownership of connection and closes it when the generator finishes,
+    including when the consumer stops early.
+    """
+    cursor = connection.cursor(buffered=False, dictionary=dictionary)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+        cursor.close()
+    finally:
+        # Closing the connection discards any unread rows of an early stop
+        connection.close()
+
 # 🧱 Create table user_data if not exists
-def create_table(connection):
-    cursor = connection.cursor()
-    create_table_query = """
-    CREATE TABLE IF NOT EXISTS user_data (
-        user_id CHAR(36) PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL,
-        age DECIMAL NOT NULL,
-        INDEX(user_id)
-    );
+def create_table(connection, tuned=False):
+    """
+    Creates user_data. With tuned=True the redundant INDEX(user_id) is left
+    out and an (age, user_id) index is added, which covers the age filters
+    and aggregates in 1-batch_processing.py and 4-stream_ages.py.
     """
+    cursor = connection.cursor()
+    if tuned:
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS user_data (
+            user_id CHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL NOT NULL,
+            INDEX idx_age_user (age, user_id)
+        );
+        """
+    else:
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS user_data (
+            user_id CHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL NOT NULL,
+            INDEX(user_id)
+        );
+        """
     cursor.execute(create_table_query)
     connection.commit()
     cursor.close()
     print("Table user_data created successfully")
 
+# Queries timed before and after migrate_schema
+TUNING_QUERIES = {
+    'age_filter': "SELECT user_id, age FROM user_data WHERE age > 25",
+    'age_count': "SELECT COUNT(*) FROM user_data WHERE age > 25",
+    'age_aggregate': "SELECT COUNT(*), AVG(age), MIN(age), MAX(age) FROM user_data",
+}
+
+# ⏱️ Time each of TUNING_QUERIES on connection
+def time_queries(connection):
+    timings = {}
+    cursor = connection.cursor()
+    for name, query in TUNING_QUERIES.items():
+        start = time.perf_counter()
+        cursor.execute(query)
+        cursor.fetchall()
+        timings[name] = time.perf_counter() - start
+    cursor.close()
+    return timings
+
+# 🛠️ Bring an existing user_data table to the tuned schema, online
+def migrate_schema(connection):
+    """
+    Drops secondary indexes that duplicate the user_id primary key and adds
+    the (age, user_id) index, with ALGORITHM=INPLACE, LOCK=NONE so reads and
+    writes continue during the change. Prints the timings of
+    TUNING_QUERIES before and after, and returns them.
+    """
+    before = time_queries(connection)
+
+    cursor = connection.cursor()
+    cursor.execute("""
+    SELECT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+    GROUP BY INDEX_NAME
+    HAVING INDEX_NAME != 'PRIMARY'
+       AND GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) = 'user_id'
+    """)
+    duplicates = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+    SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+      AND INDEX_NAME = 'idx_age_user'
+    LIMIT 1
+    """)
+    has_age_index = cursor.fetchone() is not None
+
+    for index in duplicates:
+        cursor.execute(f"ALTER TABLE user_data DROP INDEX `{index}`, "
+                       "ALGORITHM=INPLACE, LOCK=NONE")
+    if not has_age_index:
+        cursor.execute("ALTER TABLE user_data ADD INDEX idx_age_user (age, user_id), "
+                       "ALGORITHM=INPLACE, LOCK=NONE")
+    cursor.close()
+
+    after = time_queries(connection)
+    for name in TUNING_QUERIES:
+        print(f"{name:<14} {before[name]:.3f}s -> {after[name]:.3f}s")
+    return {'before': before, 'after': after}
+
+# 🆔 Build the (user_id, name, email, age) tuple for a CSV row
+def _row_values(row):
+    # CSVs without a user_id column get a deterministic UUID derived from the
+    # email, so re-running the seed never creates duplicate users.
+    user_id = row.get('user_id') or str(uuid.uuid5(uuid.NAMESPACE_URL, row['email']))
+    return (user_id, row['name'], row['email'], row['age'])
+
+# 📄 Yield (user_id, name, email, age) tuples for every CSV row
+def _csv_values(csv_file, use_mmap=False):
+    if not use_mmap:
+        with open(csv_file, mode='r', encoding='utf-8', newline='') as file:
+            for row in csv.DictReader(file):
+                yield _row_values(row)
+        return
+
+    # Tuple rows straight off the memory map, no dict per row
+    rows = mmap_csv.read_rows(csv_file)
+    yield from _tuple_values(next(rows, ()), rows)
+
+# 🆔 Same as _row_values, for tuple rows laid out as in header
+def _tuple_values(header, rows):
+    if not header:
+        return  # empty CSV, same as csv.DictReader
+    name, email, age = (header.index(c) for c in ('name', 'email', 'age'))
+    user_id = header.index('user_id') if 'user_id' in header else None
+    for row in rows:
+        if user_id is not None and row[user_id]:
+            key = row[user_id]
+        else:
+            key = str(uuid.uuid5(uuid.NAMESPACE_URL, row[email]))
+        yield (key, row[name], row[email], row[age])
+
+# 📦 Split any iterable into lists of at most chunk_size items
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
 # 📥 Insert data from CSV if not already in table
-def insert_data(connection, csv_file):
+def insert_data(connection, csv_file, mode='row', chunk_size=1000, upsert=False,
+                use_mmap=False):
+    """
+    Loads csv_file into user_data.
+    mode='row' checks and inserts one row at a time, mode='bulk' sends
+    chunk_size rows per statement (see bulk_insert_data), mode='infile'
+    hands the whole file to the server (see load_data_infile) and
+    mode='delta' only writes new or changed rows (see delta_insert_data).
+    """
+    if mode == 'bulk':
+        return bulk_insert_data(connection, csv_file, chunk_size, upsert, use_mmap)
+    if mode == 'infile':
+        return load_data_infile(connection, csv_file, chunk_size)
+    if mode == 'delta':
+        return delta_insert_data(connection, csv_file, chunk_size, use_mmap=use_mmap)
+
     cursor = connection.cursor()
 
     if not os.path.exists(csv_file):
@@ -64,21 +218,215 @@ def insert_data(connection, csv_file):
     with open(csv_file, mode='r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
         for row in reader:
+            values = _row_values(row)
             # Check if the record already exists
-            cursor.execute("SELECT user_id FROM user_data WHERE user_id = %s", (row['user_id'],))
+            cursor.execute("SELECT user_id FROM user_data WHERE user_id = %s", (values[0],))
             exists = cursor.fetchone()
             if not exists:
                 insert_query = """
                 INSERT INTO user_data (user_id, name, email, age)
                 VALUES (%s, %s, %s, %s)
                 """
-                cursor.execute(insert_query, (
-                    row['user_id'],
-                    row['name'],
-                    row['email'],
-                    row['age']
-                ))
+                cursor.execute(insert_query, values)
 
     connection.commit()
     cursor.close()
     print("CSV data inserted into user_data table (if not already present)")
+
+# 🧩 Send one chunk of value tuples as a single multi-row INSERT
+def _insert_chunk(cursor, chunk, upsert=False, table='user_data'):
+    verb = "INSERT" if upsert else "INSERT IGNORE"
+    suffix = (" ON DUPLICATE KEY UPDATE name = VALUES(name),"
+              " email = VALUES(email), age = VALUES(age)") if upsert else ""
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+    cursor.execute(
+        f"{verb} INTO {table} (user_id, name, email, age) "
+        f"VALUES {placeholders}{suffix}",
+        [value for values in chunk for value in values]
+    )
+    return cursor.rowcount
+
+# 🚚 Insert data from CSV in multi-row chunks, one commit per chunk
+def bulk_insert_data(connection, csv_file, chunk_size=1000, upsert=False,
+                     use_mmap=False):
+    """
+    Streams csv_file in chunks of chunk_size rows and sends each chunk as a
+    single multi-row INSERT IGNORE (or INSERT ... ON DUPLICATE KEY UPDATE
+    when upsert=True). Existing user_ids are skipped by the primary key, so
+    the load stays idempotent without a SELECT per row.
+    With use_mmap=True the file is parsed through mmap_csv.read_rows.
+    Returns the number of rows read from the CSV.
+    """
+    if not os.path.exists(csv_file):
+        print(f"CSV file {csv_file} not found.")
+        return 0
+
+    cursor = connection.cursor()
+    total = 0
+    affected = 0
+    start = time.perf_counter()
+
+    for chunk in _chunks(_csv_values(csv_file, use_mmap), chunk_size):
+        affected += _insert_chunk(cursor, chunk, upsert)
+        connection.commit()
+        total += len(chunk)
+
+    cursor.close()
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float('inf')
+    print(f"Bulk loaded {total} rows ({affected} affected) "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total
+
+# Errors meaning the client or server refuses LOAD DATA LOCAL INFILE
+LOCAL_INFILE_DISABLED_ERRORS = (
+    1148,  # ER_NOT_ALLOWED_COMMAND
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+)
+
+# ⚡ Load the whole CSV server-side through a staging table
+def load_data_infile(connection, csv_file, chunk_size=1000):
+    """
+    Sends csv_file to MySQL with LOAD DATA LOCAL INFILE into a temporary
+    staging table, then merges it into user_data with one INSERT ... SELECT.
+    The rows are first rewritten as (user_id, name, email, age) through
+    _csv_values, so users without a user_id get the same uuid5 as in the
+    other modes and re-seeding in any mode skips them.
+    The connection must be opened with allow_local_infile=True; pass None to
+    have one opened through connect_to_prodev(). Falls back to
+    bulk_insert_data when the server disallows local infile.
+    Returns the number of rows merged into user_data.
+    """
+    if not os.path.exists(csv_file):
+        print(f"CSV file {csv_file} not found.")
+        return 0
+
+    start = time.perf_counter()
+    # The uuid5 fallback can't be computed server-side, so LOAD DATA reads
+    # a copy of the CSV with the user_id already filled in. csv.writer
+    # quotes by doubling "" and never escapes with a backslash, hence
+    # ESCAPED BY '' below
+    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', newline='',
+                                     suffix='.csv', delete=False) as file:
+        csv.writer(file, lineterminator='\n').writerows(_csv_values(csv_file))
+        load_file = file.name
+
+    own_connection = connection is None
+    if own_connection:
+        connection = connect_to_prodev(allow_local_infile=True)
+        if not connection:
+            os.remove(load_file)
+            return 0
+        create_table(connection)
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS user_data_staging (
+            user_id CHAR(36),
+            name VARCHAR(255),
+            email VARCHAR(255),
+            age DECIMAL
+        )
+        """)
+        cursor.execute("TRUNCATE TABLE user_data_staging")
+        cursor.execute("""
+        LOAD DATA LOCAL INFILE %s INTO TABLE user_data_staging
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY '\\n'
+        (user_id, name, email, age)
+        """, (load_file,))
+        cursor.execute("""
+        INSERT IGNORE INTO user_data (user_id, name, email, age)
+        SELECT user_id, name, email, age FROM user_data_staging
+        """)
+        merged = cursor.rowcount
+        connection.commit()
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS user_data_staging")
+    except mysql.connector.Error as err:
+        if err.errno not in LOCAL_INFILE_DISABLED_ERRORS:
+            raise
+        print(f"LOAD DATA LOCAL INFILE unavailable ({err}), "
+              "falling back to batched inserts")
+        cursor.close()
+        cursor = None
+        return bulk_insert_data(connection, csv_file, chunk_size)
+    finally:
+        os.remove(load_file)
+        if cursor is not None:
+            cursor.close()
+        if own_connection:
+            connection.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"LOAD DATA merged {merged} rows into user_data in {elapsed:.2f}s")
+    return merged
+
+# 🔑 Short content hash of a row's name, email and age
+def _row_hash(values):
+    content = "\x1f".join(values[1:]).encode('utf-8')
+    return hashlib.blake2b(content, digest_size=8).hexdigest()
+
+# 📒 Read the stored hashes of rows still present in user_data. Rows that
+# were deleted (or a truncated/recreated user_data) count as new again
+def _load_hashes(cursor, table):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id CHAR(36) PRIMARY KEY,
+        row_hash CHAR(16) NOT NULL
+    )
+    """)
+    cursor.execute(f"SELECT h.user_id, h.row_hash FROM {table} h "
+                   "JOIN user_data u ON u.user_id = h.user_id")
+    return dict(cursor.fetchall())
+
+# 📝 Record the hashes of one written chunk, in its transaction
+def _save_hashes(cursor, table, hashes):
+    placeholders = ", ".join(["(%s, %s)"] * len(hashes))
+    cursor.execute(
+        f"INSERT INTO {table} (user_id, row_hash) VALUES {placeholders} "
+        "ON DUPLICATE KEY UPDATE row_hash = VALUES(row_hash)",
+        [value for item in hashes for value in item]
+    )
+
+# 🔁 Upsert only the CSV rows that are new or changed since the last run
+def delta_insert_data(connection, csv_file, chunk_size=1000, table='user_data_hashes',
+                      use_mmap=False):
+    """
+    Compares every CSV row against per-row content hashes stored in a
+    sidecar table of the same database (user_data_hashes by default) and
+    upserts only the rows whose name, email or age changed, or that are
+    new. Each chunk's hashes are committed together with its rows, and
+    hashes of users no longer in user_data are ignored, so a dropped or
+    truncated user_data, or a fresh database, is loaded in full again.
+    Returns the number of rows written.
+    """
+    if not os.path.exists(csv_file):
+        print(f"CSV file {csv_file} not found.")
+        return 0
+
+    cursor = connection.cursor()
+    previous = _load_hashes(cursor, table)
+    total = 0
+
+    def changed_rows():
+        nonlocal total
+        for values in _csv_values(csv_file, use_mmap):
+            total += 1
+            row_hash = _row_hash(values)
+            if previous.get(values[0]) != row_hash:
+                yield values, row_hash
+
+    written = 0
+    start = time.perf_counter()
+    for chunk in _chunks(changed_rows(), chunk_size):
+        _insert_chunk(cursor, [values for values, _ in chunk], upsert=True)
+        _save_hashes(cursor, table, [(values[0], row_hash) for values, row_hash in chunk])
+        connection.commit()
+        written += len(chunk)
+    cursor.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Delta seed wrote {written} of {total} rows in {elapsed:.2f}s")
+    return written
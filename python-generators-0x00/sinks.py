@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+import csv
+import json
+import sys
+
+
+class Sink:
+    """
+    Base class for row outputs. Rows are handed over in bulk with
+    write_many(); subclasses only implement _write_rows(). Use as a context
+    manager (or call flush()) so buffered rows are written out.
+    """
+
+    def __init__(self, buffer_rows=1000):
+        self.buffer_rows = buffer_rows
+        self.count = 0
+        self._pending = []
+
+    def write(self, row):
+        self.write_many((row,))
+
+    def write_many(self, rows):
+        self._pending.extend(rows)
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._write_rows(self._pending)
+            self.count += len(self._pending)
+            self._pending = []
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        # The caller owns the underlying file, so closing only flushes
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class StdoutSink(Sink):
+    """
+    Writes rows exactly as print(row) would, but as one write per buffer
+    instead of one per row.
+    """
+
+    def __init__(self, file=None, buffer_rows=1000):
+        super().__init__(buffer_rows)
+        self.file = file or sys.stdout
+
+    def _write_rows(self, rows):
+        self.file.write("\n".join(map(str, rows)) + "\n")
+
+
+class NDJSONSink(Sink):
+    """
+    Writes one JSON document per line. Decimals and other non-JSON values
+    are written as strings.
+    """
+
+    def __init__(self, file=None, buffer_rows=1000):
+        super().__init__(buffer_rows)
+        self.file = file or sys.stdout
+        self._encoder = json.JSONEncoder(default=str)
+
+    def _write_rows(self, rows):
+        encode = self._encoder.encode
+        self.file.write("\n".join(encode(row) for row in rows) + "\n")
+
+
+class CSVSink(Sink):
+    """
+    Writes rows as CSV. Dict rows are written in `columns` order (taken from
+    the first row when not given) with a header line; tuples as they are.
+    """
+
+    def __init__(self, file=None, columns=None, buffer_rows=1000):
+        super().__init__(buffer_rows)
+        self.file = file or sys.stdout
+        self.columns = columns
+        self._writer = csv.writer(self.file)
+        self._header_written = False
+
+    def _write_rows(self, rows):
+        if isinstance(rows[0], dict):
+            if self.columns is None:
+                self.columns = list(rows[0])
+            if not self._header_written:
+                self._writer.writerow(self.columns)
+                self._header_written = True
+            rows = [[row[column] for column in self.columns] for row in rows]
+        self._writer.writerows(rows)
+
+
+class NullSink(Sink):
+    """
+    Discards rows and only counts them, to benchmark the database side.
+    """
+
+    def write_many(self, rows):
+        # Any iterable, like Sink.write_many: generators have no len()
+        self.count += sum(1 for _ in rows)
+
+    def _write_rows(self, rows):
+        pass
+
+
+SINKS = {
+    'stdout': StdoutSink,
+    'ndjson': NDJSONSink,
+    'csv': CSVSink,
+    'null': NullSink,
+}